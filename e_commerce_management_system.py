@@ -1,86 +1,125 @@
-from enum import Enum
+from enum import IntEnum
 
-class UserRole(Enum):
-    CUSTOMER = "customer"
-    ADMIN = "admin"
-    VENDOR = "vendor"
-    
-class OrderStatus(Enum):
-    PENDING = "pending"
-    CONFIRMED = "confirmed"
-    SHIPPED = "shipped"
-    DELIVERED = "delivered"
-    CANCELLED = "cancelled"
-    
-class PaymentStatus(Enum):
-    PENDING ="pending"
-    COMPLETED = "completed"
-    FAILED = "failed"
-    REFUNDED = "refunded"
-    
-class PaymentMethod(Enum):
-    CREDIT_CARD = "credit_card"
-    DEBIT_CARD = "debit_card"
-    NET_BANKING = "net_banking"
-    WALLET = "wallet"
+class LabelledEnum(IntEnum):
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+class UserRole(LabelledEnum):
+    CUSTOMER = 0
+    ADMIN = 1
+    VENDOR = 2
+    
+class OrderStatus(LabelledEnum):
+    PENDING = 0
+    CONFIRMED = 1
+    SHIPPED = 2
+    DELIVERED = 3
+    CANCELLED = 4
+    
+class PaymentStatus(LabelledEnum):
+    PENDING = 0
+    COMPLETED = 1
+    FAILED = 2
+    REFUNDED = 3
+    
+class PaymentMethod(LabelledEnum):
+    CREDIT_CARD = 0
+    DEBIT_CARD = 1
+    NET_BANKING = 2
+    WALLET = 3
     
 
 import uuid
 import hashlib
-from typing import List, Optional, Dict
+import hmac
+import itertools
+import math
+import os
+import time
+from array import array
+from collections import defaultdict
+from typing import List, Optional, Dict, Tuple, Iterable, Callable
+
+#set to True when ids must stay unique across processes
+USE_UUID_IDS = False
+_id_counter = itertools.count(1)
+
+def _next_id() -> str:
+    if USE_UUID_IDS:
+        return str(uuid.uuid4())
+    return str(next(_id_counter))
 
 class Category:
     def __init__(self, name:str, description:str):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.description = description
+        self.id = _next_id()
         self.subcategories: List["Category"] = []
         self.parent: Optional["Category"] = None
+        self.name = name
+        self.description = description
+        
+    @property
+    def name(self) -> str:
+        return self._name
+    
+    @name.setter
+    def name(self, value: str):
+        self._name = value
+        self._refresh_full_path()
         
     def add_subcategory(self, category:"Category"):
         category.parent = self
         self.subcategories.append(category)
+        category._refresh_full_path()
         
-    def get_full_path(self) -> str:
+    def _refresh_full_path(self):
         if self.parent:
-            return f'{self.parent.get_full_path()} > {self.name}'
-        return self.name
+            self._full_path = f'{self.parent._full_path} > {self._name}'
+        else:
+            self._full_path = self._name
+        for subcategory in self.subcategories:
+            subcategory._refresh_full_path()
+        
+    def get_full_path(self) -> str:
+        return self._full_path
     
 
 class User:
     def __init__(self, username: str, email: str, password: str, role: UserRole = UserRole.CUSTOMER):
-        self.id = str(uuid.uuid4())
+        self.id = _next_id()
         self.username = username
         self.email = email
+        self._password_salt = os.urandom(16)
         self._password_hash = self._hash_password(password) 
         self.role = role
         self.address: List[Address] = []
         self.cart: Cart = Cart(self)
-        self.wishlit: List[Product] = []
+        self.wishlist: Dict[str, Product] = {}
         self.orders: List[Order] = []
         
-    def _hash_password(self,password: str) ->str:
-        return hashlib.sha256(password.encode()).hexdigest()
+    def _hash_password(self,password: str) ->bytes:
+        #fast salted hash for this in-memory demo; a real store should use hashlib.scrypt
+        return hashlib.blake2b(password.encode(), digest_size=32, salt=self._password_salt).digest()
     
     def verify_password(self, password: str) -> bool:
-        return self._password_hash == self._hash_password(password)
+        return hmac.compare_digest(self._password_hash, self._hash_password(password))
     
     def add_address(self,address: "Address"):
         self.address.append(address)
         
     def add_to_wishlist(self, product: "Product"):
-        if product not in self.wishlist:
-            self.wishlist.append(product)
+        self.wishlist.setdefault(product.id, product)
             
     def remove_from_wishlist(self, product: "Product"):
-        if product in self.wishlist:
-            self.wishlist.remove(product)
+        self.wishlist.pop(product.id, None)
             
             
             
 class Address:
+    __slots__ = ('id', 'street', 'city', 'state', 'postal_code', 'country')
+    
     def __init__(self, street: str, city: str, state: str, postal_code: str, country:str):
-        self.id = str(uuid.uuid4())
+        self.id = _next_id()
         self.street = street
         self.city = city
         self.state = state
@@ -91,8 +130,12 @@ class Address:
         return f'{self.street}, {self.city}, {self.state}, {self.postal_code}, {self.country}'
     
 class Product:
+    __slots__ = ('id', '_name', '_description', '_name_lower', '_desc_lower', '_price', 'category',
+                 'vendor', 'stock_quantity', 'reviews', 'image', 'specification', 'is_active',
+                 '_rating_sum', '_rating_count')
+    
     def __init__(self, name: str, description:str, price:float, category: Category, vendor: User):
-        self.id = str(uuid.uuid4())
+        self.id = _next_id()
         self.name = name
         self.description = description
         self._price = price
@@ -100,10 +143,30 @@ class Product:
         self.vendor = vendor
         self.stock_quantity = 0
         self.reviews: List[Review] = []
+        self._rating_sum = 0
+        self._rating_count = 0
         self.image: List[str] = []
         self.specification: Dict[str, str] = {}
         self.is_active = True
         
+    @property
+    def name(self) -> str:
+        return self._name
+    
+    @name.setter
+    def name(self, value: str):
+        self._name = value
+        self._name_lower = value.lower()
+        
+    @property
+    def description(self) -> str:
+        return self._description
+    
+    @description.setter
+    def description(self, value: str):
+        self._description = value
+        self._desc_lower = value.lower()
+        
     @property
     def price(self)-> float:
         return self._price
@@ -114,6 +177,12 @@ class Product:
             raise ValueError("Price cannot be negative")
         self._price = value
         
+    @property
+    def average_rating(self) -> float:
+        if not self._rating_count:
+            return 0.0
+        return self._rating_sum / self._rating_count
+        
     def add_stock(self, quantity: int):
         if quantity < 0:
             raise ValueError("Quantity cannot be negative")
@@ -137,20 +206,33 @@ class Product:
 
 import datetime
 class Review:
+    __slots__ = ('id', 'user', 'product', 'rating', 'comment', 'timestamp_ns')
     
     def __init__(self, user: User, product: Product, rating: int, comment:str):
         
-        self.id = str(uuid.uuid4())
+        self.id = _next_id()
         self.user = user
-        self. product = self.rating = min(max(rating, 1) , 5)
-        self. comment = comment
-        self.timestamp = datetime.now()
+        self.product = product
+        self.rating = min(max(rating, 1) , 5)
+        self.comment = comment
+        self.timestamp_ns = time.time_ns()
+        
+        product.reviews.append(self)
+        product._rating_sum += self.rating
+        product._rating_count += 1
+        
+    @property
+    def timestamp(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.timestamp_ns / 1e9)
         
         
 class  CartItem:
+    __slots__ = ('product', '_quantity', '_subtotal')
+    
     def __init__(self, product: Product, quantity: int):
         self.product = product
         self._quantity = quantity
+        self._subtotal = product.price * quantity
         
     @property 
     def quantity(self) -> int:
@@ -164,10 +246,12 @@ class  CartItem:
             raise ValueError("Quantity cannot be exceed available stock")
             
         self._quantity = value
+        self._subtotal = self.product.price * value
         
     @property 
     def subtotal(self)-> float:
-        return self.product.price * self.quantity
+        #priced when the quantity was last set; later price changes are not picked up
+        return self._subtotal
         
     
     
@@ -176,43 +260,54 @@ class  CartItem:
 class Cart:
     def __init__(self, user: User):
         self.user = user 
-        self.items: List(CartItem)= []
+        self.items: Dict[str, CartItem] = {}
+        self._total = 0.0
         
     def add_item(self, product: Product, quantity: int = 1) -> bool:
         if product.stock_quantity < quantity:
             return False
         
-        existing_item = next((item for item in self.items if item.product == product), None)
+        existing_item = self.items.get(product.id)
     
         if existing_item:
+            previous = existing_item.subtotal
             existing_item.quantity += quantity
+            self._total += existing_item.subtotal - previous
         else:
-            self.items.append(CartItem(product, quantity))
+            item = CartItem(product, quantity)
+            self.items[product.id] = item
+            self._total += item.subtotal
         return True
     
     def remove_item(self, product: Product):
-        self.items = [item for item in self.items if item.product != product]
+        item = self.items.pop(product.id, None)
+        if item:
+            #re-sum instead of subtracting so rounding error from earlier deltas is dropped
+            self._total = math.fsum(item.subtotal for item in self.items.values())
         
         
     def update_quantity(self, product:Product, quantity : int)-> bool:
-        item = next((item for item in self.items if item.product == product), None)
+        item = self.items.get(product.id)
         
         if item:
+            previous = item.subtotal
             try:
                 item.quantity = quantity
-                return True
             except ValueError:
                 return False
-            return False
+            self._total += item.subtotal - previous
+            return True
+        return False
         
     
     def clear(self):
         self.items.clear()
+        self._total = 0.0
         
         
     @property 
     def total(self)-> float:
-        return sum(item.subtotal for item in self.items)
+        return self._total
         
 
 
@@ -229,7 +324,6 @@ class PaymentProcessor(ABC):
     
 
 
-import re
 class CreditCardProcessor(PaymentProcessor):
     def process_payment(self, amount: float, payment_info:Dict) -> bool:
         
@@ -242,27 +336,57 @@ class CreditCardProcessor(PaymentProcessor):
         return True
     
     def _validate_card_number(self, card_number: str) -> bool:
-        return bool(re.match(r'^\d{16}$', card_number))
+        return len(card_number) == 16 and card_number.isascii() and card_number.isdigit()
         
     
 
 class Order:
+    __slots__ = ('id', 'user', '_items', '_subtotal', 'shipping_address', 'order_date_ns', '_status',
+                 'payment_method', 'payment_status', 'shipping_cost', 'tracking_number', '_on_change')
     
     def __init__(self, user:User, shipping_address: Address):
-        self.id = str(uuid.uuid4())
+        self.id = _next_id()
         self.user = user
-        self.items: List[CartItem] = []
+        self._on_change: Optional[Callable[["Order"], None]] = None
+        self.items = ()
         self.shipping_address = shipping_address
-        self.order_date = datetime.datetime.now()
+        self.order_date_ns = time.time_ns()
         self.status = OrderStatus.PENDING
         self.payment_method: Optional[PaymentMethod] = None
+        self.payment_status = PaymentStatus.PENDING
         self.shipping_cost = 0.0
         self.tracking_number: Optional[str] = None
         
         
+    @property 
+    def items(self) -> Tuple[CartItem, ...]:
+        return self._items
+    
+    @items.setter 
+    def items(self, value: Iterable[CartItem]):
+        #stored as a tuple so the lines cannot change behind the cached subtotal
+        self._items = tuple(value)
+        self._subtotal = sum(item.subtotal for item in self._items)
+        if self._on_change:
+            self._on_change(self)
+        
     @property 
     def subtotal(self) -> float:
-        return sum(item.subtotal for item in self.items)
+        return self._subtotal
+    
+    @property 
+    def order_date(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.order_date_ns / 1e9)
+    
+    @property 
+    def status(self) -> OrderStatus:
+        return self._status
+    
+    @status.setter 
+    def status(self, value: OrderStatus):
+        self._status = value
+        if self._on_change:
+            self._on_change(self)
     
     @property 
     def total(self) -> float:
@@ -271,11 +395,11 @@ class Order:
     
     def add_tracking_number(self, tracking_number: str):
         self.tracking_number = tracking_number
-        self.status = OrderStatus().SHIPPED
+        self.status = OrderStatus.SHIPPED
         
     
     def cancel_order(self) -> bool:
-        if self.status in [OrderStatus.PENDING, OrderStatus.CONFIRMED]:
+        if self.status < OrderStatus.SHIPPED:
             self.status = OrderStatus.CANCELLED
             
             
@@ -290,24 +414,33 @@ class Order:
 class EcommerceSystem:
     def __init__(self):
         self.users: List[User] = []
-        self.products: List[Product] = [] 
+        self._users_by_email: Dict[str, User] = {}
+        self._users_by_username: Dict[str, User] = {}
+        self.products: Dict[str, Product] = {}
+        self._products_by_category: Dict[str, List[Product]] = defaultdict(list)
         self.categories: List[Category] = []
         self.orders: List[Order] = []
-        self.payment_processors: Dict[PaymentMethod, PaymentProcessor] = {
-            PaymentMethod. CREDIT_CARD: CreditCardProcessor()
-            }
+        #per-order columns, row i describes self.orders[i]
+        self._order_rows: Dict[str, int] = {}
+        self._order_subtotals = array('d')
+        self._order_status_codes = array('b')
+        #indexed by PaymentMethod value, None where no processor is registered
+        self.payment_processors: List[Optional[PaymentProcessor]] = [None] * len(PaymentMethod)
+        self.payment_processors[PaymentMethod.CREDIT_CARD] = CreditCardProcessor()
     
     def register_user(self, username: str, email: str, password: str, role: UserRole) -> User:
         
         
-        if any(user.email == email for user in self.users): 
+        if email in self._users_by_email: 
             raise ValueError( "Email already registered")
             
-        if any(user.username == username for user in self.users):
+        if username in self._users_by_username:
             raise ValueError(" Username already taken")
             
         user = User(username, email, password, role)
         self.users.append(user)
+        self._users_by_email[email] = user
+        self._users_by_username[username] = user
         
         
         return user
@@ -315,32 +448,56 @@ class EcommerceSystem:
         if not user.cart.items:
             return None
         
-        for cart_item in user.cart.items:
-            if cart_item.quantity > cart_item.product.stock_quantity:
+        items = list(user.cart.items.values())
+        for item in items:
+            if item.quantity > item.product.stock_quantity:
                 return None
             
         order = Order(user, shipping_address)
-        order.items = user.cart.items.copy()
+        order.items = items
         
-        for item in order.items:
-            item.product.remove_stock(item.quantity)
+        for item in items:
+            #stock was checked above, so skip remove_stock's re-check
+            item.product.stock_quantity -= item.quantity
             
         
-        #claer cart
+        #clear cart
         user.cart.clear()
         
-        #add ord4ers to system and user
+        #add orders to system and user
         
-        self.orders.append(order)
+        self._record_order(order)
         user.orders.append(order)
         
         return order 
     
     
+    def _record_order(self, order: Order):
+        if order._on_change is not None:
+            raise ValueError("Order already recorded")
+        self._order_rows[order.id] = len(self.orders)
+        self.orders.append(order)
+        self._order_subtotals.append(order.subtotal)
+        self._order_status_codes.append(order.status)
+        order._on_change = self._refresh_order_row
+        
+    def _refresh_order_row(self, order: Order):
+        row = self._order_rows[order.id]
+        self._order_subtotals[row] = order.subtotal
+        self._order_status_codes[row] = order.status
+        
+    def orders_by_status(self, status: OrderStatus) -> List[Order]:
+        return [self.orders[i] for i, code in enumerate(self._order_status_codes) if code == status]
+    
+    def orders_over(self, amount: float) -> List[Order]:
+        return [self.orders[i] for i, subtotal in enumerate(self._order_subtotals) if subtotal > amount]
+    
     def process_payment(self, order: Order, payment_method: PaymentMethod, payment_info: Dict) -> bool:
-        process = self.payment_processors.get(payment_method)
+        if not isinstance(payment_method, PaymentMethod):
+            return False
+        process = self.payment_processors[payment_method]
         
-        if not process:
+        if process is None:
             return False
         
         if process.process_payment(order.total, payment_info):
@@ -350,17 +507,28 @@ class EcommerceSystem:
             
             return True
     
-        order.payment_method = PaymentStatus.FAILED
+        order.payment_status = PaymentStatus.FAILED
         return False
     
+    def add_product(self, product: Product):
+        if product.id in self.products:
+            return
+        self.products[product.id] = product
+        self._products_by_category[product.category.id].append(product)
+    
     def search_products(self, query: str, category: Optional[Category] = None) -> List[Product]:
-        results = []
-        for product in self.products:
-            if(query.lower() in product.name.lower() or query.lower() in product.description.lower()):
-                results.append(product)
-                
-                
-        return results
+        q = query.lower()
+        
+        #limited to the category's products when one is given
+        candidates = self.products_in_category(category) if category else self.products.values()
+        return [product for product in candidates
+                if q in product._name_lower or q in product._desc_lower]
+    
+    def get_product(self, product_id: str) -> Optional[Product]:
+        return self.products.get(product_id)
+    
+    def products_in_category(self, category: Category) -> List[Product]:
+        return self._products_by_category.get(category.id, [])
     
 def main():
     system= EcommerceSystem()
@@ -390,7 +558,7 @@ def main():
     Iphone_x.add_stock(10)
     Iphone_x.add_specification("screen size", "6 inch")
     Iphone_x.add_specification("storage size", "128gb")
-    system.products.append(Iphone_x)
+    system.add_product(Iphone_x)
     
     #add address
     print("==================adding address===================")